@@ -34,7 +34,6 @@ setup(
         "m2r >= 0.2",
         "mistune <= 0.8.4",
         "picobox >= 2.2",
-        "deepmerge >= 0.1",
     ],
     project_urls={
         "Documentation": "https://sphinxcontrib-openapi.readthedocs.io/",
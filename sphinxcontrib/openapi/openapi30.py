@@ -8,8 +8,6 @@
     :license: BSD, see LICENSE for details.
 """
 
-import copy
-
 import collections
 import collections.abc
 
@@ -54,6 +52,21 @@ _TYPE_MAPPING = {
 _READONLY_PROPERTY = object()  # sentinel for values not included in requests
 
 
+def _json_clone(obj):
+    """Deep copy of a JSON-like object.
+
+    Specs are loaded from JSON or YAML, so containers are only ever dicts and
+    lists. Everything else is treated as an immutable scalar and is shared
+    instead of being copied, which makes this a lot cheaper than
+    :func:`copy.deepcopy`.
+    """
+    if isinstance(obj, dict):
+        return {k: _json_clone(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_json_clone(v) for v in obj]
+    return obj
+
+
 def _dict_merge(dct, merge_dct):
     """Recursive dict merge.
 
@@ -87,7 +100,7 @@ def _parse_schema(schema, method):
 
     # allOf: Must be valid against all of the subschemas
     if 'allOf' in schema:
-        schema_ = copy.deepcopy(schema['allOf'][0])
+        schema_ = _json_clone(schema['allOf'][0])
         for x in schema['allOf'][1:]:
             _dict_merge(schema_, x)
 
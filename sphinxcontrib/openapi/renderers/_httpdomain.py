@@ -1,8 +1,6 @@
 """OpenAPI spec renderer."""
 
-import collections
 import contextlib
-import copy
 import functools
 import http.client
 import json
@@ -13,59 +11,107 @@ import m2r
 import requests
 import sphinx.util.logging as logging
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from sphinxcontrib.openapi import _lib2to3 as lib2to3
 from sphinxcontrib.openapi.renderers import abc
-from sphinxcontrib.openapi.schema_utils import example_from_schema, resolve_combining_schema, resolve_reference, \
-    traverse_schema, rebuild_references
+from sphinxcontrib.openapi.schema_utils import example_from_schema_cached, \
+    resolve_combining_schema, resolve_reference, traverse_schema, rebuild_references, \
+    reset_caches
 
 CaseInsensitiveDict = requests.structures.CaseInsensitiveDict
 
+_PARAM_KINDS = CaseInsensitiveDict(
+    {"path": "param", "query": "queryparam", "header": "reqheader"}
+)
+
+_STATUS_TEXTS = {str(code): text for code, text in http.client.responses.items()}
+
+_JSON_MIMETYPE_RE = re.compile(r"application/(?:json|.*\+json)")
+
+_FORM_DATA_MIMETYPES = frozenset(
+    {"application/x-www-form-urlencoded", "multipart/form-data"}
+)
+
 
 logger = logging.getLogger(__name__)
 
+# External examples are often hosted on the same server, so let's reuse
+# connections instead of establishing a new one for each example.
+_session = requests.Session()
+
 
 def indented(generator, indent=3):
-    for item in generator:
-        if item:
-            item = " " * indent + item
-        yield item
+    # Rendering functions are nested a few levels deep, and each level indents
+    # lines of the inner one. Building a list here instead of yielding lines
+    # one by one saves a generator frame switch per line per nesting level.
+    prefix = " " * indent
+    return [prefix + item if item else item for item in generator]
+
+
+def _dumps_example(example, use_orjson=False):
+    """Serialize a given example to indented JSON."""
+
+    # orjson output differs from the standard library one in a few ways, e.g.
+    # non-ASCII characters are not escaped, NaN becomes null and exponents
+    # are written differently. Hence it's used only when asked for, so the
+    # rendered docs do not depend on whether it happens to be installed.
+    if use_orjson and orjson is not None:
+        try:
+            return orjson.dumps(
+                example, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+            ).decode("utf-8")
+        except TypeError:
+            # orjson is stricter than json, e.g. it refuses integers that do
+            # not fit 64 bits. Let the standard library have a go then.
+            pass
+    return json.dumps(example, indent=2)
 
 
 def _iterinorder(iterable, order_by, key=lambda x: x, case_sensitive=False):
     """Iterate over iterable in a given order."""
 
-    order_by = collections.defaultdict(
-        # Assume default priority is `Infinity` which means the lowest one.
-        # This value is effectively used if there's no corresponding value in a
-        # given 'order_by' array.
-        lambda: float("Inf"),
-        # Passed 'order_by' may be 'None' which means *do not reorder, use
-        # natural order*. In order to avoid special cases in the code, we're
-        # simply falling back to an empty 'order_by' array since it effectively
-        # means *assume every item in 'iterable' has equal priority*.
-        ((value, i) for i, value in enumerate(order_by or [])),
-    )
-    yield from sorted(
-        iterable,
-        key=lambda value: order_by[
-            key(value) if case_sensitive else key(value).lower()
-        ],
-    )
-
-
-def _iterexamples(media_types, example_preference, examples_from_schemas):
+    # Passed 'order_by' may be 'None' which means *do not reorder, use natural
+    # order*. In order to avoid special cases in the code, we're simply falling
+    # back to an empty 'order_by' array since it effectively means *assume
+    # every item in 'iterable' has equal priority*.
+    priorities = {value: i for i, value in enumerate(order_by or [])}
+
+    # Assume default priority is `Infinity` which means the lowest one. This
+    # value is effectively used if there's no corresponding value in a given
+    # 'order_by' array.
+    lowest = float("Inf")
+
+    if case_sensitive:
+        yield from sorted(
+            iterable, key=lambda value: priorities.get(key(value), lowest)
+        )
+    else:
+        yield from sorted(
+            iterable, key=lambda value: priorities.get(key(value).lower(), lowest)
+        )
+
+
+def _iterexamples(
+    media_types, example_preference, examples_from_schemas, resolve_references=None
+):
     """Iterate over examples and return them according to the caller preference."""
 
     for content_type in _iterinorder(media_types, example_preference):
         media_type = media_types[content_type]
+        examples = media_type.get("examples")
+        schema = media_type.get("schema")
 
         # Look for a example in a bunch of possible places. According to
         # OpenAPI v3 spec, `examples` and `example` keys are mutually
         # exclusive, so there's no much difference between their
         # inspection order, while both must take precedence over a
         # schema example.
-        if media_type.get("examples", {}):
-            for example in media_type["examples"].values():
+        if examples:
+            for example in examples.values():
                 if "externalValue" in example:
                     if not example["externalValue"].startswith(("http://", "https://")):
                         logger.warning(
@@ -75,7 +121,9 @@ def _iterexamples(media_types, example_preference, examples_from_schemas):
                         continue
 
                     try:
-                        response = requests.get(example["externalValue"])
+                        response = _session.get(
+                            example["externalValue"], timeout=10
+                        )
                         response.raise_for_status()
 
                         example["value"] = response.text
@@ -96,16 +144,25 @@ def _iterexamples(media_types, example_preference, examples_from_schemas):
             # Save example from "example" in "examples" compatible format. This
             # allows to treat all returned examples the same way.
             example = {"value": media_type["example"]}
-        elif media_type.get("schema", {}).get("example"):
-            # Save example from "schema" in "examples" compatible format. This
-            # allows to treat all returned examples the same way.
-            example = {"value": media_type["schema"]["example"]}
-        elif "schema" in media_type and examples_from_schemas:
-            # Convert schema to example
-            example = {"value": example_from_schema(media_type["schema"])}
-            pass
         else:
-            continue
+            # Resolving references is not free, so it's done only for a
+            # media type whose example is about to be looked up in its schema.
+            if (
+                schema is not None
+                and resolve_references is not None
+                and _is_json_mimetype(content_type)
+            ):
+                schema = resolve_references(schema)
+
+            if schema and schema.get("example"):
+                # Save example from "schema" in "examples" compatible format.
+                # This allows to treat all returned examples the same way.
+                example = {"value": schema["example"]}
+            elif schema is not None and examples_from_schemas:
+                # Convert schema to example
+                example = {"value": example_from_schema_cached(schema)}
+            else:
+                continue
 
         yield content_type, example
 
@@ -140,18 +197,13 @@ def _get_markers_from_object(oas_object, schema):
 def _is_json_mimetype(mimetype):
     """Returns 'True' if a given mimetype implies JSON data."""
 
-    return any(
-        [
-            mimetype == "application/json",
-            mimetype.startswith("application/") and mimetype.endswith("+json"),
-        ]
-    )
+    return _JSON_MIMETYPE_RE.fullmatch(mimetype) is not None
 
 
 def _is_form_data_mimetype(mimetype):
     """Returns 'True' if a given mimetype is a url-encoded or form-data mime type"""
 
-    return mimetype in ("application/x-www-form-urlencoded", "multipart/form-data")
+    return mimetype in _FORM_DATA_MIMETYPES
 
 
 def _is_2xx_status(status_code):
@@ -168,23 +220,22 @@ def _get_schema_type(schema):
     # in this case neither in OpenAPI nor in JSON Schema specifications. Thus
     # let's assume what everyone assumes, and try to guess schema type at least
     # for two most popular types: 'object' and 'array'.
-    if "type" not in schema:
-        if "properties" in schema:
-            schema_type = "object"
-        elif "items" in schema:
-            schema_type = "array"
-        else:
-            schema_type = None
-    else:
-        schema_type = schema["type"]
-    return schema_type
+    schema_type = schema.get("type")
+    if schema_type is not None:
+        return schema_type
+
+    if "properties" in schema:
+        return "object"
+    elif "items" in schema:
+        return "array"
+    return None
 
 
 class HttpdomainRenderer(abc.RestructuredTextRenderer):
     """Render OpenAPI v3 using `sphinxcontrib-httpdomain` extension."""
 
     _markup_converters = {"commonmark": m2r.convert, "restructuredtext": lambda x: x}
-    _response_examples_for = {"200", "201", "202", "2XX"}
+    _response_examples_for = frozenset({"200", "201", "202", "2XX"})
     _request_parameters_order = ["header", "path", "query", "cookie"]
 
     option_spec = {
@@ -197,6 +248,7 @@ class HttpdomainRenderer(abc.RestructuredTextRenderer):
         "response-example-preference": None,
         "generate-examples-from-schemas": directives.flag,
         "no-json-schema-description": directives.flag,
+        "orjson-examples": directives.flag,
         "include": lambda s: s.split(),
         "exclude": lambda s: s.split(),
     }
@@ -205,18 +257,33 @@ class HttpdomainRenderer(abc.RestructuredTextRenderer):
         super().__init__(state, options)
 
         self._rendering_schema = None
-
-        self._include = options.get("include")
-        self._exclude = options.get("exclude")
-
-        self._convert_markup = self._markup_converters[
-            options.get("markup", "commonmark")
+        self._ref_cache = {}
+
+        # Include and exclude patterns are compiled once instead of for every
+        # path. They are not combined into a single expression though, since
+        # that would break patterns with inline flags, named groups or
+        # backreferences.
+        self._include = [
+            re.compile(regex) for regex in options.get("include") or [".+"]
         ]
+        self._exclude = [re.compile(regex) for regex in options.get("exclude") or []]
+
+        # Descriptions are often shared across operations, and markup
+        # conversion is a pure function of its input, so let's not convert the
+        # same text twice.
+        self._convert_markup = functools.lru_cache(maxsize=8192)(
+            self._markup_converters[options.get("markup", "commonmark")]
+        )
         self._http_methods_order = [
             http_method.lower() for http_method in options.get("http-methods-order", [])
         ]
-        self._response_examples_for = options.get(
-            "response-examples-for", self._response_examples_for
+        # Status code ranges may be written as either '2XX' or '2xx', so
+        # they are normalized to upper case in order to be compared.
+        self._response_examples_for = frozenset(
+            status_code.upper()
+            for status_code in options.get(
+                "response-examples-for", self._response_examples_for
+            )
         )
         self._request_parameters_order = [
             parameter_type.lower()
@@ -233,6 +300,7 @@ class HttpdomainRenderer(abc.RestructuredTextRenderer):
         )
         self._generate_example_from_schema = "generate-examples-from-schemas" in options
         self._json_schema_description = "no-json-schema-description" not in options
+        self._use_orjson = "orjson-examples" in options
 
     def render_restructuredtext_markup(self, spec):
         """Spec render entry point."""
@@ -240,43 +308,37 @@ class HttpdomainRenderer(abc.RestructuredTextRenderer):
         if spec.get("swagger") == "2.0":
             spec = lib2to3.convert(spec)
 
-        spec_paths = spec.get("paths", {})
-        paths = self.filter_paths(spec_paths.keys())
-
         self._rendering_schema = spec
-        yield from self.render_paths({
-            k: spec_paths[k] for k in paths
-        })
-        self._rendering_schema = None
-
-    def filter_paths(self, iterable):
-        path_keys = []
-
-        excludes = []
-        includes = []
-
-        if self._exclude:
-            for regex in self._exclude:
-                excludes.append(re.compile(regex))
-
-        if self._include:
-            for regex in self._include:
-                includes.append(re.compile(regex))
-        else:
-            includes = [re.compile(".+")]
+        self._ref_cache = {}
+        reset_caches()
+        try:
+            yield from self.render_paths(dict(self.iter_paths(spec.get("paths", {}))))
+        finally:
+            # Caches keep cached schemas alive, so they must be cleared even if
+            # rendering fails or is not run to completion.
+            self._rendering_schema = None
+            self._ref_cache = {}
+            reset_caches()
 
-        for path in iterable:
-            if any(r.match(path) for r in includes) and not any(r.match(path) for r in excludes):
-                if path not in path_keys:
-                    path_keys.append(path)
+    def iter_paths(self, paths):
+        """Iterate over OAS paths that pass include and exclude filters."""
 
-        return list(path_keys)
+        for endpoint, path in paths.items():
+            if any(regex.match(endpoint) for regex in self._include) and not any(
+                regex.match(endpoint) for regex in self._exclude
+            ):
+                yield endpoint, path
 
     def render_paths(self, paths):
         """Render OAS paths item."""
 
         for endpoint, path in paths.items():
-            common_parameters = path.pop("parameters", [])
+            # Common parameters are the same for every operation of the path,
+            # so their identifying keys are computed once.
+            common_parameters = [
+                ((parameter["name"], parameter["in"]), parameter)
+                for parameter in path.pop("parameters", [])
+            ]
 
             # OpenAPI's path description may contain objects of different
             # types. Since we're interested in rendering only objects of
@@ -294,9 +356,8 @@ class HttpdomainRenderer(abc.RestructuredTextRenderer):
                 )
                 operation["parameters"] = [
                     parameter
-                    for parameter in common_parameters
-                    if (parameter["name"], parameter["in"])
-                    not in operation_parameters_ids
+                    for parameter_id, parameter in common_parameters
+                    if parameter_id not in operation_parameters_ids
                 ] + operation["parameters"]
 
                 yield from self.render_operation(endpoint, method, operation)
@@ -339,9 +400,7 @@ class HttpdomainRenderer(abc.RestructuredTextRenderer):
     def render_parameter(self, parameter):
         """Render OAS operation's parameter."""
 
-        kinds = CaseInsensitiveDict(
-            {"path": "param", "query": "queryparam", "header": "reqheader"}
-        )
+        kinds = _PARAM_KINDS
         schema = parameter.get("schema", {})
 
         if "content" in parameter:
@@ -397,9 +456,10 @@ class HttpdomainRenderer(abc.RestructuredTextRenderer):
 
         content_type, example = next(
             _iterexamples(
-                self.resolve_content_references(request_body["content"]),
+                request_body["content"],
                 self._request_example_preference,
                 self._generate_example_from_schema,
+                self.resolve_schema_references,
             ),
             (None, None),
         )
@@ -408,7 +468,7 @@ class HttpdomainRenderer(abc.RestructuredTextRenderer):
             example = example["value"]
 
             if not isinstance(example, str):
-                example = json.dumps(example, indent=2)
+                example = _dumps_example(example, self._use_orjson)
 
             yield f".. sourcecode:: http"
             yield f""
@@ -438,15 +498,20 @@ class HttpdomainRenderer(abc.RestructuredTextRenderer):
             # guessing going on, let's ensure it's always string at this point.
             yield from self.render_response(str(status_code), response)
 
-    def resolve_content_references(self, content):
-        content = copy.deepcopy(content)
-        for content_type in content:
-            if _is_json_mimetype(content_type):
-                if "schema" in content[content_type]:
-                    schema = content[content_type]["schema"]
-                    content[content_type]["schema"] = rebuild_references(self._rendering_schema, schema)
-
-        return content
+    def resolve_schema_references(self, schema):
+        # Large specs tend to share the same handful of schemas across many
+        # operations, so resolved schemas are cached for the rendering pass.
+        # Both the rendering schema and the schema itself are kept in the
+        # cache entry in order to keep them alive, and thus ensure their
+        # identities are not reused by other objects.
+        key = (id(self._rendering_schema), id(schema))
+        if key not in self._ref_cache:
+            self._ref_cache[key] = (
+                self._rendering_schema,
+                schema,
+                rebuild_references(self._rendering_schema, schema),
+            )
+        return self._ref_cache[key][2]
 
     def render_response(self, status_code, response):
         """Render OAS operation's response."""
@@ -456,13 +521,13 @@ class HttpdomainRenderer(abc.RestructuredTextRenderer):
             self._convert_markup(response["description"]).strip().splitlines()
         )
 
-        if "content" in response and status_code in self._response_examples_for:
+        if (
+            "content" in response
+            and status_code.upper() in self._response_examples_for
+        ):
             yield ""
             yield from indented(
-                self.render_response_example(
-                    self.resolve_content_references(response["content"]),
-                    status_code,
-                )
+                self.render_response_example(response["content"], status_code)
             )
 
         if "headers" in response:
@@ -508,6 +573,7 @@ class HttpdomainRenderer(abc.RestructuredTextRenderer):
                 media_type,
                 self._response_example_preference,
                 self._generate_example_from_schema,
+                self.resolve_schema_references,
             ),
             (None, None),
         )
@@ -516,7 +582,7 @@ class HttpdomainRenderer(abc.RestructuredTextRenderer):
             example = example["value"]
 
             if not isinstance(example, str):
-                example = json.dumps(example, indent=2)
+                example = _dumps_example(example, self._use_orjson)
 
             # According to OpenAPI v3 spec, status code may be a special value
             # - "default". It's not quite clear what to render in this case.
@@ -533,8 +599,8 @@ class HttpdomainRenderer(abc.RestructuredTextRenderer):
                 # of response codes. Since we're talking about rendered example
                 # here, we may show either code from range, but for the sake of
                 # simplicity let's pick the first one.
-                status_code = status_code.replace("XX", "00")
-                status_text = http.client.responses.get(int(status_code), "-")
+                status_code = status_code.upper().replace("XX", "00")
+                status_text = _STATUS_TEXTS.get(status_code, "-")
 
             yield f".. sourcecode:: http"
             yield f""
@@ -546,6 +612,12 @@ class HttpdomainRenderer(abc.RestructuredTextRenderer):
     def render_json_schema_description(self, schema, req_or_res):
         """Render JSON schema's description."""
 
+        # On root level, httpdomain supports only 'object' and 'array' types.
+        # If a schema is explicitly of a primitive type, no combining schema
+        # can turn it into either of them, so let's not bother resolving it.
+        if schema.get("type") in {"string", "integer", "number", "boolean", "null"}:
+            return
+
         schema = resolve_combining_schema(schema)
         schema_type = _get_schema_type(schema)
         if schema_type is None and "$ref" in schema:
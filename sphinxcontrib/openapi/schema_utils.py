@@ -1,25 +1,47 @@
 """OpenAPI schema utility functions."""
 import collections
-import copy
-from io import StringIO
+import itertools
+import types
 
-import deepmerge
-
-# collections.Mapping has been moved to `collections.abc.Mapping` in python 3.10
 from jsonpointer import resolve_pointer
 
-try:
-    Mapping = collections.abc.Mapping
-except AttributeError:
-    Mapping = collections.Mapping
-
-_DEFAULT_EXAMPLES = {
-    "string": "string",
-    "integer": 1,
-    "number": 1.0,
-    "boolean": True,
-    "array": [],
-}
+_DEFAULT_EXAMPLES = types.MappingProxyType(
+    {
+        "string": "string",
+        "integer": 1,
+        "number": 1.0,
+        "boolean": True,
+        "array": [],
+    }
+)
+_DEFAULT_EXAMPLES_VALUES = tuple(_DEFAULT_EXAMPLES.values())
+
+
+# Results of schema resolution and example generation are cached by identity
+# of the objects they were computed from. Cache entries keep those objects
+# alive, so their identities can't be reused by other objects until caches
+# are reset.
+_reference_cache = {}
+_combining_schema_cache = {}
+_example_cache = {}
+_has_references_cache = {}
+
+
+def reset_caches():
+    """Drop cached results of schema resolution and example generation."""
+
+    _reference_cache.clear()
+    _combining_schema_cache.clear()
+    _example_cache.clear()
+    _has_references_cache.clear()
+
+
+_COMBINERS = frozenset({"oneOf", "anyOf", "allOf"})
+
+# Read-only defaults for missing keys, so there's no need to allocate a new
+# empty container every time a key is missing.
+_EMPTY_MAPPING = types.MappingProxyType({})
+_EMPTY_SEQUENCE = ()
 
 
 _DEFAULT_STRING_EXAMPLES = {
@@ -60,6 +82,8 @@ def example_from_schema(schema):
     ...     "tag": "string"
     ... }
     """
+    schema_type = schema.get("type")
+
     # If an example was provided then we use that
     if "example" in schema:
         return schema["example"]
@@ -73,8 +97,9 @@ def example_from_schema(schema):
     elif "allOf" in schema:
         # Combine schema examples
         example = {}
+        update = example.update
         for sub_schema in schema["allOf"]:
-            example.update(example_from_schema(sub_schema))
+            update(example_from_schema(sub_schema))
         return example
 
     elif "enum" in schema:
@@ -84,13 +109,13 @@ def example_from_schema(schema):
         # Any type
         return _DEFAULT_EXAMPLES["integer"]
 
-    elif "properties" in schema or schema.get("type") == "object":
-        example = {}
-        for prop, prop_schema in schema.get("properties", {}).items():
-            example[prop] = example_from_schema(prop_schema)
-        return example
+    elif "properties" in schema or schema_type == "object":
+        return {
+            prop: example_from_schema(prop_schema)
+            for prop, prop_schema in schema.get("properties", _EMPTY_MAPPING).items()
+        }
 
-    elif "items" in schema or schema.get("type") == "array":
+    elif "items" in schema or schema_type == "array":
         items = schema["items"]
         min_length = schema.get("minItems", 0)
         max_length = schema.get("maxItems", max(min_length, 2))
@@ -101,17 +126,17 @@ def example_from_schema(schema):
         example_items = []
         if items == {}:
             # Any-type arrays
-            example_items.extend(_DEFAULT_EXAMPLES.values())
+            example_items.extend(_DEFAULT_EXAMPLES_VALUES)
         elif isinstance(items, dict) and "oneOf" in items:
             # Mixed-type arrays
-            example_items.append(_DEFAULT_EXAMPLES[sorted(items["oneOf"])[0]])
+            example_items.append(_DEFAULT_EXAMPLES[min(items["oneOf"])])
         else:
             example_items.append(example_from_schema(items))
 
         # Generate array containing example_items and satisfying min_length and max_length
-        return [example_items[i % len(example_items)] for i in range(gen_length)]
+        return list(itertools.islice(itertools.cycle(example_items), gen_length))
 
-    elif schema["type"] == "string":
+    elif schema_type == "string":
         example_string = _DEFAULT_STRING_EXAMPLES.get(
             schema.get("format", None), _DEFAULT_EXAMPLES["string"]
         )
@@ -126,14 +151,13 @@ def example_from_schema(schema):
         if min_length <= len(example_string) <= max_length:
             return example_string
         else:
-            example_builder = StringIO()
-            for i in range(gen_length):
-                example_builder.write(example_string[i % len(example_string)])
-            example_builder.seek(0)
-            return example_builder.read()
-
-    elif schema["type"] in ("integer", "number"):
-        example = _DEFAULT_EXAMPLES[schema["type"]]
+            # Repeat the example as many times as needed to cover the
+            # requested length, and cut off the rest.
+            repeats = gen_length // len(example_string) + 1
+            return (example_string * repeats)[:gen_length]
+
+    elif schema_type in ("integer", "number"):
+        example = _DEFAULT_EXAMPLES[schema_type]
         if "minimum" in schema and "maximum" in schema:
             # Take average
             example = schema["minimum"] + (schema["maximum"] - schema["minimum"]) / 2
@@ -141,17 +165,43 @@ def example_from_schema(schema):
             example = schema["minimum"] + 1
         elif "maximum" in schema and example >= schema["maximum"]:
             example = schema["maximum"] - 1
-        return float(example) if schema["type"] == "number" else int(example)
+        return float(example) if schema_type == "number" else int(example)
 
     else:
-        return _DEFAULT_EXAMPLES[schema["type"]]
+        return _DEFAULT_EXAMPLES[schema_type]
 
 
-_merge_mappings = deepmerge.Merger(
-    [(Mapping, deepmerge.strategy.dict.DictStrategies("merge"))],
-    ["override"],
-    ["override"],
-).merge
+def _merge_dicts(target, source):
+    """Merge 'source' into 'target' recursively, and return 'target'.
+
+    Nested dictionaries are merged, while any other value from 'source'
+    overrides the one from 'target'. Values are never copied unless they are
+    about to be modified, hence neither 'source' nor values of 'target' are
+    ever mutated, and the result may share them.
+    """
+
+    for key, value in source.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            target[key] = _merge_dicts(target[key].copy(), value)
+        else:
+            target[key] = value
+    return target
+
+
+def example_from_schema_cached(schema):
+    """
+    Same as :func:`example_from_schema`, but generates an example for a given
+    schema object only once until caches are reset.
+
+    The same example object is returned for the same schema, so it must not be
+    modified by the caller.
+    """
+    try:
+        return _example_cache[id(schema)][1]
+    except KeyError:
+        example = example_from_schema(schema)
+        _example_cache[id(schema)] = (schema, example)
+        return example
 
 
 def _get_schema_type(schema):
@@ -175,54 +225,89 @@ def _get_schema_type(schema):
 
 
 def traverse_schema(top_level, block, name, is_required=False):
-    schema_type = _get_schema_type(block)
-    if "$ref" in block:
-        yield from traverse_schema(
-            top_level,
-            resolve_reference(top_level, block["$ref"]),
-            name,
-            is_required,
-        )
-    elif {"oneOf", "anyOf", "allOf"} & block.keys():
-        # Since an item can represented by either or any schema from
-        # the array of schema in case of `oneOf` and `anyOf`
-        # respectively, the best we can do for them is to render the
-        # first found variant. In other words, we are going to traverse
-        # only a single schema variant and leave the rest out. This is
-        # by design and it was decided so in order to keep produced
-        # description clear and simple.
-        yield from traverse_schema(
-            top_level, resolve_combining_schema(block), name
-        )
-    elif "not" in block:
-        yield name, {}, is_required
-    elif schema_type == "object":
-        if name:
-            yield name, block, is_required
-
-        required = set(block.get("required", []))
-
-        for key, value in block.get("properties", {}).items():
-            # In case of the first recursion call, when 'name' is an
-            # empty string, we should go with 'key' only in order to
-            # avoid leading dot at the beginning.
-            yield from traverse_schema(
-                top_level,
-                value,
-                f"{name}.{key}" if name else key,
-                is_required=key in required,
-            )
-    elif schema_type == "array":
-        yield from traverse_schema(top_level, block["items"], f"{name}[]")
+    # Schemas may be nested arbitrarily deep, so an explicit stack is used
+    # instead of recursion in order to never hit the recursion limit. Each
+    # item also carries references expanded on its way from the root, which
+    # is needed to stop on self-referencing schemas. Names are carried as
+    # tuples of path segments, which are joined only when yielded.
+    path = (name,) if name else ()
+    stack = collections.deque([(block, path, is_required, frozenset())])
+
+    while stack:
+        block, path, is_required, refs = stack.pop()
+
+        # References and combining schemas never yield anything on their own,
+        # so they are resolved right away instead of going through the stack.
+        while "$ref" in block or not _COMBINERS.isdisjoint(block):
+            if "$ref" in block:
+                if block["$ref"] in refs:
+                    break
+                refs = refs | {block["$ref"]}
+                block = resolve_reference(top_level, block["$ref"])
+            else:
+                # Since an item can represented by either or any schema from
+                # the array of schema in case of `oneOf` and `anyOf`
+                # respectively, the best we can do for them is to render the
+                # first found variant. In other words, we are going to
+                # traverse only a single schema variant and leave the rest
+                # out. This is by design and it was decided so in order to
+                # keep produced description clear and simple.
+                block = resolve_combining_schema(block)
+                is_required = False
+
+        if "$ref" in block:
+            # The schema references itself, hence traversing it would never
+            # end. Let's render the reference as is and do not descend into
+            # it.
+            if path:
+                resolved = resolve_reference(top_level, block["$ref"])
+                yield ".".join(path), resolved, is_required
+            continue
+
+        if "not" in block:
+            yield ".".join(path), {}, is_required
+            continue
+
+        # Schema type is needed only for non-reference and non-combining
+        # schemas, hence there's no point to guess it for every visited node.
+        schema_type = _get_schema_type(block)
+        if schema_type == "object":
+            if path:
+                yield ".".join(path), block, is_required
+
+            required = set(block.get("required", _EMPTY_SEQUENCE))
+            properties = list(block.get("properties", _EMPTY_MAPPING).items())
+
+            # Items are popped from the end of the stack, so properties are
+            # pushed in reverse order to be visited in the natural one.
+            for key, value in reversed(properties):
+                stack.append((value, path + (key,), key in required, refs))
+        elif schema_type == "array":
+            # Array items are denoted by '[]' suffix of the array name, or
+            # just by '[]' in case of the root array.
+            path = path[:-1] + (path[-1] + "[]",) if path else ("[]",)
+            stack.append((block["items"], path, False, refs))
+
+        elif "enum" in block:
+            yield ".".join(path), block, is_required
+
+        elif schema_type is not None:
+            yield ".".join(path), block, is_required
 
-    elif "enum" in block:
-        yield name, block, is_required
 
-    elif schema_type is not None:
-        yield name, block, is_required
+def resolve_combining_schema(schema):
+    try:
+        return _combining_schema_cache[id(schema)][1]
+    except KeyError:
+        pass
 
+    resolved = _resolve_combining_schema(schema)
+    if resolved is not schema:
+        _combining_schema_cache[id(schema)] = (schema, resolved)
+    return resolved
 
-def resolve_combining_schema(schema):
+
+def _resolve_combining_schema(schema):
     if "oneOf" in schema:
         # The part with merging is a vague one since I only found a
         # single 'oneOf' example where such merging was assumed, and no
@@ -247,7 +332,7 @@ def resolve_combining_schema(schema):
         # object type.
         merged_schema = schema.copy()
         for item in merged_schema.pop("allOf"):
-            merged_schema = _merge_mappings(merged_schema, copy.deepcopy(item))
+            merged_schema = _merge_dicts(merged_schema, item)
         return merged_schema
 
     elif "not" in schema:
@@ -257,22 +342,57 @@ def resolve_combining_schema(schema):
     return schema
 
 
+def _has_references(block):
+    """Returns 'True' if a given schema may need rebuilding references."""
+
+    try:
+        return _has_references_cache[id(block)][1]
+    except KeyError:
+        pass
+
+    # Besides references, 'rebuild_references' resolves combining schemas
+    # too, so both are looked for. The check is deliberately coarse, and
+    # looks into every nested value as if it was a schema, which may produce
+    # false positives but never false negatives.
+    if "$ref" in block or not _COMBINERS.isdisjoint(block):
+        result = True
+    else:
+        result = False
+        for value in block.values():
+            if isinstance(value, dict):
+                result = _has_references(value)
+            elif isinstance(value, list):
+                result = any(
+                    _has_references(item) for item in value if isinstance(item, dict)
+                )
+            if result:
+                break
+
+    _has_references_cache[id(block)] = (block, result)
+    return result
+
+
 def rebuild_references(top_level, block):
+    # There's nothing to rebuild in a schema without references and combining
+    # schemas, so let's return it as is without walking and copying it.
+    if not _has_references(block):
+        return block
+
     schema_type = _get_schema_type(block)
     if schema_type == "object":
         if "properties" in block:
             properties = {}
             for k, v in block["properties"].items():
                 properties[k] = rebuild_references(top_level, v)
-            return {**block, "properties": properties}
-        else:
-            return block
+            block = block.copy()
+            block["properties"] = properties
+        return block
     elif schema_type == "array":
-        return {
-            **block,
-            "items": rebuild_references(top_level, block["items"])
-        }
-    elif {"oneOf", "anyOf", "allOf"} & block.keys():
+        items = rebuild_references(top_level, block["items"])
+        block = block.copy()
+        block["items"] = items
+        return block
+    elif not _COMBINERS.isdisjoint(block):
         return rebuild_references(
             top_level, resolve_combining_schema(block),
         )
@@ -284,8 +404,34 @@ def rebuild_references(top_level, block):
         return block
 
 
+def _resolve_local_pointer(document, pointer):
+    # References in OpenAPI specs are almost always plain paths to objects,
+    # such as '/components/schemas/Foo', so they are walked right away. Any
+    # other case, including errors, is left to 'jsonpointer'.
+    if not pointer.startswith("/"):
+        return resolve_pointer(document, pointer)
+
+    current = document
+    for part in pointer[1:].split("/"):
+        if not isinstance(current, dict):
+            return resolve_pointer(document, pointer)
+
+        part = part.replace("~1", "/").replace("~0", "~")
+        if part not in current:
+            return resolve_pointer(document, pointer)
+        current = current[part]
+    return current
+
+
 def resolve_reference(schema, link):
-    if link.startswith("#"):
-        return resolve_pointer(schema, link[1:]).copy()
-    else:
-        raise NotImplementedError("Resolving references to URIs is not currently supported.")
+    """Resolve a given local reference.
+
+    The resolved schema is shared with the document it was resolved from, so
+    it must not be modified by the caller.
+    """
+    key = (id(schema), link)
+    if key not in _reference_cache:
+        if not link.startswith("#"):
+            raise NotImplementedError("Resolving references to URIs is not currently supported.")
+        _reference_cache[key] = (schema, _resolve_local_pointer(schema, link[1:]))
+    return _reference_cache[key][1]
@@ -10,6 +10,9 @@ def textify(generator):
 @pytest.mark.parametrize("options", [
     {"include": ["/included/.+"]},
     {"exclude": ["/excluded"]},
+    {"include": ["/unknown", "/included/.+"]},
+    {"exclude": ["/unknown", "/excluded"]},
+    {"include": ["/included/.+", "/excluded"], "exclude": ["/excluded"]},
 ])
 def test_filter_path_includes_paths(fakestate, oas_fragment, options):
     """Paths that match are included"""
@@ -35,3 +38,25 @@ def test_filter_path_includes_paths(fakestate, oas_fragment, options):
     )
     assert ".. http:get:: /included/123" in markup
     assert ".. http:get:: /excluded" not in markup
+
+
+@pytest.mark.parametrize("options, included, excluded", [
+    ({"include": ["(?i)/included"]}, "/INCLUDED", "/excluded"),
+    ({"exclude": ["(?i)/excluded"]}, "/included", "/EXCLUDED"),
+    ({"include": ["/(a)", r"/(b)\1"]}, "/bb", "/bc"),
+    ({"include": ["/(?P<x>a)", "/(?P<x>b)"]}, "/b", "/c"),
+])
+def test_filter_path_patterns_stay_independent(
+    fakestate, oas_fragment, options, included, excluded
+):
+    """Inline flags, backreferences and group names are per pattern"""
+    testrenderer = renderers.HttpdomainRenderer(fakestate, options)
+    paths = oas_fragment(f"""
+        {included}:
+          get:
+            responses: {{}}
+        {excluded}:
+          get:
+            responses: {{}}
+    """)
+    assert list(testrenderer.iter_paths(paths)) == [(included, paths[included])]
@@ -1414,3 +1414,81 @@ def test_render_json_schema_description_with_references(
         :{typedirective} some_key: {schema_type}
         """
     ).rstrip()
+
+
+@pytest.mark.parametrize(
+    ["req_or_res", "directive", "typedirective"],
+    [
+        pytest.param("req", "reqjson", "reqjsonobj", id="req"),
+        pytest.param("res", "resjson", "resjsonobj", id="res"),
+    ],
+)
+def test_render_json_schema_description_with_recursive_references(
+        testrenderer, oas_fragment, req_or_res, directive, typedirective
+):
+    """JSON schema description is generated for self-referencing schema."""
+
+    schema = oas_fragment(
+        """
+        definitions:
+          Node:
+            type: object
+            properties:
+              name:
+                type: string
+              children:
+                type: array
+                items:
+                  $ref: "#/definitions/Node"
+        """
+    )
+    fragment = oas_fragment(
+        """
+        type: object
+        properties:
+          root:
+            $ref: "#/definitions/Node"
+        """
+    )
+    with testrenderer.override_schema(schema):
+        markup = textify(
+            testrenderer.render_json_schema_description(
+                fragment,
+                req_or_res
+            )
+        )
+    assert markup == textwrap.dedent(
+        f"""\
+        :{directive} root:
+        :{typedirective} root: object
+        :{directive} root.name:
+        :{typedirective} root.name: string
+        :{directive} root.children[]:
+        :{typedirective} root.children[]: object
+        """
+    ).rstrip()
+
+
+@pytest.mark.parametrize(
+    ["req_or_res", "directive", "typedirective"],
+    [
+        pytest.param("req", "reqjson", "reqjsonobj", id="req"),
+        pytest.param("res", "resjson", "resjsonobj", id="res"),
+    ],
+)
+def test_render_json_schema_description_deeply_nested(
+        testrenderer, req_or_res, directive, typedirective
+):
+    """JSON schema description is generated for deeply nested schema."""
+
+    schema = {"type": "string"}
+    for _ in range(2000):
+        schema = {"type": "object", "properties": {"a": schema}}
+
+    markup = textify(
+        testrenderer.render_json_schema_description(schema, req_or_res)
+    )
+    assert markup.splitlines()[-2:] == [
+        f":{directive} {'.'.join(['a'] * 2000)}:",
+        f":{typedirective} {'.'.join(['a'] * 2000)}: string",
+    ]
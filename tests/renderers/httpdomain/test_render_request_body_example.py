@@ -335,6 +335,43 @@ def test_renders_example_request_body_recursive_references(
     assert markup == textwrap.dedent(expected)
 
 
+def test_renders_example_request_body_references_resolved_lazily(
+        testrenderer, oas_fragment
+):
+    """References are not resolved for media types that are not rendered."""
+    testrenderer._generate_example_from_schema = True
+
+    with testrenderer.override_schema({"definitions": {}}):
+        markup = textify(
+            testrenderer.render_request_body_example(
+                oas_fragment(
+                    """
+                    content:
+                      application/json:
+                        example:
+                          foo: bar
+                      application/problem+json:
+                        schema:
+                          $ref: "#/definitions/Unknown"
+                    """
+                ),
+                "/endpoint",
+                "POST"
+            ),
+        )
+
+    assert markup == textwrap.dedent("""\
+        .. sourcecode:: http
+
+           POST /endpoint HTTP/1.1
+           Content-Type: application/json
+
+           {
+             "foo": "bar"
+           }
+    """.rstrip())
+
+
 def test_renders_request_body_with_augmented_mime_types(testrenderer, oas_fragment):
     """Renders request body with augmented mime types"""
     testrenderer._generate_example_from_schema = True
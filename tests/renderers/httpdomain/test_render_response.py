@@ -261,6 +261,42 @@ def test_render_response_content_custom(fakestate, oas_fragment, status_code, st
     )
 
 
+def test_render_response_content_range_lowercase(testrenderer, oas_fragment):
+    """Path response's 'content' definition is rendered for lowercase range."""
+
+    markup = textify(
+        testrenderer.render_response(
+            "2xx",
+            oas_fragment(
+                """
+                description: An evidence.
+                content:
+                  application/json:
+                    example:
+                      foo: bar
+                      baz: 42
+                """
+            ),
+        )
+    )
+    assert markup == textwrap.dedent(
+        """\
+        :statuscode 2xx:
+           An evidence.
+
+           .. sourcecode:: http
+
+              HTTP/1.1 200 OK
+              Content-Type: application/json
+
+              {
+                "foo": "bar",
+                "baz": 42
+              }
+        """.rstrip()
+    )
+
+
 def test_render_response_content_custom_mismatch(fakestate, oas_fragment):
     """Path response's 'content' definition is NOT rendered."""
 
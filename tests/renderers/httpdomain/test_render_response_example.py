@@ -634,3 +634,100 @@ def test_render_response_status_code_default(testrenderer, oas_fragment):
            bar,42
         """.rstrip()
     )
+
+
+def test_render_response_example_json_by_default(testrenderer, oas_fragment):
+    """Examples are serialized by json even if orjson is installed."""
+
+    markup = textify(
+        testrenderer.render_response_example(
+            oas_fragment(
+                """
+                application/json:
+                  example:
+                    foo: café
+                    baz: 1.5e-07
+                """
+            ),
+            "200",
+        )
+    )
+    assert markup == textwrap.dedent(
+        """\
+        .. sourcecode:: http
+
+           HTTP/1.1 200 OK
+           Content-Type: application/json
+
+           {
+             "foo": "caf\\u00e9",
+             "baz": 1.5e-07
+           }
+        """.rstrip()
+    )
+
+
+def test_render_response_example_orjson(fakestate, oas_fragment):
+    """Examples are serialized by orjson if asked for."""
+
+    pytest.importorskip("orjson")
+
+    testrenderer = renderers.HttpdomainRenderer(fakestate, {"orjson-examples": None})
+    markup = textify(
+        testrenderer.render_response_example(
+            oas_fragment(
+                """
+                application/json:
+                  example:
+                    foo: café
+                    baz: 1.5e-07
+                """
+            ),
+            "200",
+        )
+    )
+    assert markup == textwrap.dedent(
+        """\
+        .. sourcecode:: http
+
+           HTTP/1.1 200 OK
+           Content-Type: application/json
+
+           {
+             "foo": "café",
+             "baz": 1.5e-7
+           }
+        """.rstrip()
+    )
+
+
+def test_render_response_example_orjson_fallback(fakestate, oas_fragment):
+    """Examples orjson refuses to serialize are serialized by json."""
+
+    pytest.importorskip("orjson")
+
+    testrenderer = renderers.HttpdomainRenderer(fakestate, {"orjson-examples": None})
+    markup = textify(
+        testrenderer.render_response_example(
+            oas_fragment(
+                """
+                application/json:
+                  example:
+                    foo: 1180591620717411303424
+                """
+            ),
+            "200",
+        )
+    )
+    assert markup == textwrap.dedent(
+        """\
+        .. sourcecode:: http
+
+           HTTP/1.1 200 OK
+           Content-Type: application/json
+
+           {
+             "foo": 1180591620717411303424
+           }
+        """.rstrip()
+    )
@@ -0,0 +1,117 @@
+"""OpenAPI spec renderer: resolve_schema_references."""
+
+import pytest
+
+from sphinxcontrib.openapi import renderers, schema_utils
+
+
+def test_resolve_schema_references(testrenderer, oas_fragment):
+    """References are resolved against the rendering schema."""
+
+    spec = oas_fragment(
+        """
+        components:
+          schemas:
+            Foo:
+              type: object
+              properties:
+                bar:
+                  type: string
+        """
+    )
+    schema = {"type": "array", "items": {"$ref": "#/components/schemas/Foo"}}
+
+    with testrenderer.override_schema(spec):
+        resolved = testrenderer.resolve_schema_references(schema)
+
+    assert resolved == {
+        "type": "array",
+        "items": {"type": "object", "properties": {"bar": {"type": "string"}}},
+    }
+
+
+def test_resolve_schema_references_cached(testrenderer, oas_fragment):
+    """Same schema is resolved once per rendering schema."""
+
+    spec = oas_fragment(
+        """
+        components:
+          schemas:
+            Foo:
+              type: object
+        """
+    )
+    schema = {"type": "array", "items": {"$ref": "#/components/schemas/Foo"}}
+
+    with testrenderer.override_schema(spec):
+        resolved = testrenderer.resolve_schema_references(schema)
+        assert testrenderer.resolve_schema_references(schema) is resolved
+
+    with testrenderer.override_schema(dict(spec)):
+        assert testrenderer.resolve_schema_references(schema) is not resolved
+
+
+def test_resolve_schema_references_cache_reset(fakestate, oas_fragment):
+    """Cache does not outlive the rendering pass."""
+
+    testrenderer = renderers.HttpdomainRenderer(fakestate, {})
+    list(
+        testrenderer.render_restructuredtext_markup(
+            oas_fragment(
+                """
+                openapi: 3.0.0
+                paths:
+                  /test:
+                    get:
+                      responses:
+                        '200':
+                          description: An evidence.
+                          content:
+                            application/json:
+                              schema:
+                                type: object
+                """
+            )
+        )
+    )
+
+    assert testrenderer._ref_cache == {}
+
+
+def test_resolve_schema_references_cache_reset_on_error(fakestate, oas_fragment):
+    """Cache does not outlive the rendering pass that failed."""
+
+    testrenderer = renderers.HttpdomainRenderer(fakestate, {})
+    markup = testrenderer.render_restructuredtext_markup(
+        oas_fragment(
+            """
+            openapi: 3.0.0
+            paths:
+              /test:
+                get:
+                  responses:
+                    '200':
+                      description: An evidence.
+                      content:
+                        application/json:
+                          schema:
+                            type: object
+                            properties:
+                              foo:
+                                $ref: '#/components/schemas/Foo'
+                              bar:
+                                $ref: 'https://example.com/bar.json'
+            components:
+              schemas:
+                Foo:
+                  type: string
+            """
+        )
+    )
+
+    with pytest.raises(NotImplementedError):
+        list(markup)
+
+    assert testrenderer._ref_cache == {}
+    assert testrenderer._rendering_schema is None
+    assert schema_utils._reference_cache == {}
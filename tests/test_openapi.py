@@ -1583,6 +1583,84 @@ class TestOpenApi3HttpDomain(object):
 
         ''').lstrip()
 
+    def test_all_of_example(self):
+        renderer = renderers.HttpdomainOldRenderer(None, {'examples': True})
+        base = {
+            'type': 'object',
+            'properties': {
+                'foo': {'type': 'object', 'properties': {'a': {'type': 'string'}}},
+            },
+        }
+        text = '\n'.join(renderer.render_restructuredtext_markup({
+            'openapi': '3.0.0',
+            'paths': {
+                '/resources': {
+                    'get': {
+                        'summary': 'Get resources',
+                        'responses': {
+                            '200': {
+                                'description': 'Something',
+                                'content': {
+                                    'application/json': {
+                                        'schema': {
+                                            'allOf': [
+                                                base,
+                                                {
+                                                    'properties': {
+                                                        'foo': {
+                                                            'properties': {
+                                                                'b': {'type': 'integer'},
+                                                            },
+                                                        },
+                                                    },
+                                                },
+                                            ],
+                                        }
+                                    }
+                                }
+                            },
+                        },
+                    },
+                },
+            },
+        }))
+
+        assert text == textwrap.dedent('''
+            .. http:get:: /resources
+               :synopsis: Get resources
+
+               **Get resources**
+
+
+               **Example request:**
+
+               .. sourcecode:: http
+
+                  GET /resources HTTP/1.1
+                  Host: example.com
+
+               :status 200:
+                  Something
+
+                  **Example response:**
+
+                  .. sourcecode:: http
+
+                     HTTP/1.1 200 OK
+                     Content-Type: application/json
+
+                     {
+                         "foo": {
+                             "a": "string",
+                             "b": 1
+                         }
+                     }
+
+        ''').lstrip()
+        assert base['properties']['foo'] == {
+            'type': 'object', 'properties': {'a': {'type': 'string'}},
+        }
+
     def test_ref_example(self):
         renderer = renderers.HttpdomainOldRenderer(None, {'examples': True})
         text = '\n'.join(renderer.render_restructuredtext_markup({
@@ -1,6 +1,16 @@
+import copy
+
+import jsonpointer
 import pytest
 
-from sphinxcontrib.openapi.schema_utils import example_from_schema
+from sphinxcontrib.openapi.schema_utils import (
+    example_from_schema,
+    example_from_schema_cached,
+    rebuild_references,
+    reset_caches,
+    resolve_combining_schema,
+    resolve_reference,
+)
 
 
 @pytest.mark.parametrize(
@@ -86,6 +96,22 @@ from sphinxcontrib.openapi.schema_utils import example_from_schema
             },
             id="strings",
         ),
+        pytest.param(
+            {
+                "type": "object",
+                "properties": {
+                    "exact": {"type": "string", "minLength": 12},
+                    "long": {"type": "string", "minLength": 15},
+                    "ipv6": {"type": "string", "format": "ipv6", "minLength": 8},
+                },
+            },
+            {
+                "exact": "stringstring",
+                "long": "stringstringstr",
+                "ipv6": "::1::1::",
+            },
+            id="strings_padding",
+        ),
         pytest.param(
             {
                 "type": "object",
@@ -251,3 +277,124 @@ from sphinxcontrib.openapi.schema_utils import example_from_schema
 )
 def test_generate_example_from_schema(schema, expected):
     assert example_from_schema(schema) == expected
+
+
+def test_resolve_combining_schema_all_of():
+    schema = {
+        "properties": {"baz": {"type": "boolean"}},
+        "description": "A merged schema.",
+        "allOf": [
+            {
+                "type": "object",
+                "required": ["foo"],
+                "properties": {"foo": {"type": "string"}},
+            },
+            {
+                "required": ["bar"],
+                "properties": {
+                    "foo": {"format": "date"},
+                    "bar": {"type": "integer"},
+                },
+            },
+        ],
+    }
+
+    original = copy.deepcopy(schema)
+
+    assert resolve_combining_schema(schema) == {
+        "description": "A merged schema.",
+        "type": "object",
+        "required": ["bar"],
+        "properties": {
+            "baz": {"type": "boolean"},
+            "foo": {"type": "string", "format": "date"},
+            "bar": {"type": "integer"},
+        },
+    }
+    assert schema == original
+
+
+def test_resolve_combining_schema_cached():
+    schema = {"oneOf": [{"type": "string"}, {"type": "integer"}]}
+
+    resolved = resolve_combining_schema(schema)
+    assert resolved == {"type": "string"}
+    assert resolve_combining_schema(schema) is resolved
+
+    reset_caches()
+    assert resolve_combining_schema(schema) is not resolved
+
+
+@pytest.mark.parametrize(
+    ["link", "expected"],
+    [
+        pytest.param("#/components/schemas/Foo", {"type": "string"}, id="object"),
+        pytest.param("#/components/schemas/a~1b~0c", {"type": "integer"}, id="escaped"),
+        pytest.param("#/components/examples/0", {"value": 42}, id="array"),
+    ],
+)
+def test_resolve_reference(link, expected):
+    schema = {
+        "components": {
+            "schemas": {"Foo": {"type": "string"}, "a/b~c": {"type": "integer"}},
+            "examples": [{"value": 42}],
+        }
+    }
+
+    resolved = resolve_reference(schema, link)
+    assert resolved == expected
+    assert resolve_reference(schema, link) is resolved
+
+
+def test_resolve_reference_unresolvable():
+    with pytest.raises(jsonpointer.JsonPointerException):
+        resolve_reference({"components": {}}, "#/components/schemas/Foo")
+
+
+def test_resolve_reference_uri():
+    with pytest.raises(NotImplementedError):
+        resolve_reference({}, "https://example.com/schemas.json#/Foo")
+
+
+def test_generate_example_from_schema_cached():
+    schema = {"type": "object", "properties": {"foo": {"type": "string"}}}
+
+    example = example_from_schema_cached(schema)
+    assert example == {"foo": "string"}
+    assert example_from_schema_cached(schema) is example
+
+    reset_caches()
+    assert example_from_schema_cached(schema) is not example
+
+
+def test_rebuild_references():
+    top_level = {"definitions": {"Foo": {"type": "string"}}}
+    schema = {
+        "type": "object",
+        "properties": {
+            "foo": {"$ref": "#/definitions/Foo"},
+            "bar": {"type": "array", "items": {"type": "integer"}},
+        },
+    }
+
+    rebuilt = rebuild_references(top_level, schema)
+    assert rebuilt == {
+        "type": "object",
+        "properties": {
+            "foo": {"type": "string"},
+            "bar": {"type": "array", "items": {"type": "integer"}},
+        },
+    }
+    assert rebuilt["properties"]["bar"] is schema["properties"]["bar"]
+
+
+def test_rebuild_references_nothing_to_rebuild():
+    schema = {
+        "type": "object",
+        "properties": {
+            "foo": {"type": "string"},
+            "bar": {"type": "array", "items": {"type": "integer"}},
+        },
+    }
+
+    assert rebuild_references({}, schema) is schema